@@ -25,19 +25,529 @@ The output will be at
         └── Experiment2.parquet
 """
 import pandas  # Everyone uses Pandas as a full import so I will for consistency
+import pyarrow  # And the same goes for PyArrow, and the submodules we need
+import pyarrow.csv
+import pyarrow.parquet
+import pyarrow.types
 
-from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from argparse import ArgumentParser, Namespace, RawDescriptionHelpFormatter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from fnmatch import fnmatch
+from os import cpu_count, scandir
 from pathlib import Path
+from queue import Queue
+from threading import Event, Thread
 from platform import system
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 from pandas import DataFrame  # Except for this, to make the type hinting prettier
 from tqdm import tqdm
 
 GLOB_DIRECTORY_PATTERN: str = "*"
 GLOB_SUBDIRECTORY_PATTERN: str = "*"
 GLOB_CSV_PATTERN: str = "*.[Cc][Ss][Vv]"  # Case-insensitive for the suffix.
-PARQUET_COMPRESSION: str = "gzip"  # gzip is ~20% slower than the default 'snappy', but ~2x smaller
-PARQUET_ENGINE: str = "fastparquet"  # For more options for this and compression, see pandas dataframe.to_parquet 
+PARQUET_COMPRESSION: str = "zstd"  # zstd is about as small as gzip, but several times faster to write and read
+PARQUET_COMPRESSION_LEVEL: int = 3  # zstd goes from 1 to 22; higher levels are smaller but slower to write
+PARQUET_ENGINE: str = "pyarrow"  # Streams CSVs straight to Parquet; other engines go through pandas dataframe.to_parquet
+CSV_ENGINE: str = "pyarrow"  # Parser for pandas read_csv when not streaming; much faster than 'c' on wide files
+CSV_ENGINE_OPTIONS: dict = {  # Extra read_csv options that only some of the engines accept
+    'pyarrow': {},
+    'c': {
+        'low_memory': False,  # Parse each file in one go, rather than guessing types chunk by chunk
+        'memory_map': True  # Read straight from the OS's cache of the file, without copying it first
+    },
+    'python': {
+        'memory_map': True
+    },
+}
+CSV_BLOCK_SIZE: int = 16 << 20  # Bytes of CSV that PyArrow parses into each batch (16 MiB)
+CSV_READ_AHEAD: int = 4  # Batches to parse ahead of the one being written to Parquet
+PARQUET_ROW_GROUP_SIZE: int = 1 << 18  # Rows per row group, so readers can load just the parts they need
+PARQUET_DATA_PAGE_SIZE: int = 1 << 20  # Bytes per page within each column of a row group (1 MiB)
+COLUMN_NAME_TRANSLATION: dict = str.maketrans(' ', '_')  # Parquet readers prefer names without spaces
+ARROW_LOW_PRECISION: dict = {  # The smaller types to store numeric columns as by default
+    pyarrow.float64(): pyarrow.float32(),
+    pyarrow.int64(): pyarrow.int32(),
+}
+PANDAS_LOW_PRECISION: dict = {  # The same, for the Pandas fallback
+    'float64': 'float32',
+    'int64': 'int32',
+}
+ARROW_CAST_ERRORS: tuple = (  # What Arrow raises when a column won't fit in another type
+    pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError, ValueError
+)
+
+
+class ConversionRestart(Exception):
+    """
+    Raised when part of an experiment doesn't fit what we assumed about it from the
+    start, so it has to be converted again knowing better: either with a wider
+    schema for the Parquet file, or reading one of its CSVs whole.
+    """
+    def __init__(
+            self, schema: Optional[pyarrow.Schema] = None, whole_file: Optional[Path] = None
+    ):
+        super().__init__("The experiment needs converting again")
+        self.schema: Optional[pyarrow.Schema] = schema
+        self.whole_file: Optional[Path] = whole_file
+
+
+def storage_type(data_type: pyarrow.DataType, arguments: Namespace) -> pyarrow.DataType:
+    """
+    Picks the type to write a column of the given type to Parquet as.
+
+    Empty columns don't have a type of their own yet, and later files usually fill
+    them in with numbers, so they start off as floats, like they would in pandas.
+    """
+    if data_type == pyarrow.null():
+        data_type = pyarrow.float64()
+
+    # Convert all the numeric columns to smaller, unless we know it's a good file
+    if arguments.high_precision:
+        return data_type
+    return ARROW_LOW_PRECISION.get(data_type, data_type)
+
+
+def lower_precision(dataframe: DataFrame) -> DataFrame:
+    """
+    Converts a dataframe's numeric columns to smaller types, in a single astype
+    rather than splitting the dataframe up one column at a time.
+
+    Integers too big for 32 bits would wrap around, so those keep all 64.
+    """
+    return dataframe.astype(
+        {
+            column: PANDAS_LOW_PRECISION[dtype.name]
+            for column, dtype in dataframe.dtypes.items()
+            if dtype.name in PANDAS_LOW_PRECISION and (
+                dtype.name != 'int64' or dataframe[column].between(-2 ** 31, 2 ** 31 - 1).all()
+            )
+        }
+    )
+
+
+def promote_schema(
+        schema: pyarrow.Schema, table: pyarrow.Table, arguments: Namespace
+) -> pyarrow.Schema:
+    """
+    Widens the types in a schema so that the table's columns fit in them, the same
+    way pandas does when concatenating dataframes: integers become floats if a later
+    file has fractions in, and anything that can't be made to agree becomes text.
+
+    Columns are made smaller as usual, unless their values don't fit, like
+    a millisecond timer after about 25 days, in which case they keep 64 bits.
+    """
+    fields: List[pyarrow.Field] = []
+    for field in schema:
+        column: pyarrow.ChunkedArray = table.column(field.name)
+        if column.type != field.type:
+            try:
+                column.cast(field.type)
+            except ARROW_CAST_ERRORS:
+                try:
+                    data_type: pyarrow.DataType = pyarrow.unify_schemas(
+                        [pyarrow.schema([field]), pyarrow.schema([field.with_type(column.type)])],
+                        promote_options='permissive'
+                    ).field(0).type
+                except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                    data_type = pyarrow.string()
+
+                smaller_type: pyarrow.DataType = storage_type(data_type, arguments)
+                try:
+                    column.cast(smaller_type)
+                    data_type = smaller_type
+                except ARROW_CAST_ERRORS:
+                    pass
+                field = field.with_type(data_type)
+        fields.append(field)
+
+    return pyarrow.schema(fields, metadata=schema.metadata)
+
+
+def scan_directory(directory: Path, pattern: str) -> Tuple[List[Path], Set[str]]:
+    """
+    Finds the subdirectories of a directory matching a glob pattern, ignoring hidden
+    ones, and the names of all the files next to them.
+
+    A single os.scandir tells us which entries are directories as it lists them,
+    so unlike glob we don't need to check each one separately.
+    """
+    subdirectories: List[Path] = []
+    filenames: Set[str] = set()
+    with scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if fnmatch(entry.name, pattern) and not entry.name.startswith('.'):
+                    subdirectories.append(Path(entry.path))
+            else:
+                filenames.add(entry.name)
+
+    return subdirectories, filenames
+
+
+def read_csv_batches(
+        csv_filenames: List[Path], arguments: Namespace, whole_files: Set[Path],
+        batches: Queue, stop: Event
+):
+    """
+    Reads the CSV files in order, putting each batch of rows on the queue as
+    (filename, batch) for convert_experiment to write out.
+
+    Runs on its own thread, so the next batch is being parsed while the last one is
+    written. Finishes with (filename, None), or (filename, error) if reading failed.
+
+    Arrow's streaming reader guesses each file's types from its first block, so if a
+    later block doesn't fit them, this finishes with a ConversionRestart asking for that
+    file to be in whole_files, which are read all at once so Arrow can see every row.
+    """
+    csv_filename: Optional[Path] = None
+    datetime_types: Dict[str, pyarrow.DataType] = {
+        arguments.datetimes: pyarrow.timestamp('ns')
+    } if arguments.datetimes else {}
+    column_types: Dict[str, pyarrow.DataType] = datetime_types
+    read_options: pyarrow.csv.ReadOptions = pyarrow.csv.ReadOptions(
+        block_size=CSV_BLOCK_SIZE, use_threads=True
+    )
+    timestamp_parsers: Optional[List[str]] = [
+        arguments.datetime_format
+    ] if arguments.datetime_format else None
+    try:
+        for file_number, csv_filename in enumerate(csv_filenames):
+            try:
+                if csv_filename in whole_files:
+                    # Nothing is pinned here, as we're only reading it whole because
+                    # its types change, and the writer will widen them to match
+                    table: pyarrow.Table = pyarrow.csv.read_csv(
+                        csv_filename,
+                        read_options=read_options,
+                        convert_options=pyarrow.csv.ConvertOptions(
+                            column_types=datetime_types, timestamp_parsers=timestamp_parsers
+                        )
+                    )
+                    schema: pyarrow.Schema = table.schema
+                    file_batches = table.to_batches()
+                else:
+                    reader: pyarrow.csv.CSVStreamingReader = pyarrow.csv.open_csv(
+                        csv_filename,
+                        read_options=read_options,
+                        convert_options=pyarrow.csv.ConvertOptions(
+                            column_types=column_types, timestamp_parsers=timestamp_parsers
+                        )
+                    )
+                    schema = reader.schema
+                    file_batches = reader
+
+                # Arrow ignores column types for missing columns, so check ourselves
+                for column in (arguments.index, arguments.datetimes):
+                    if column and column not in schema.names:
+                        raise KeyError(column)
+
+                # The rest of the experiment's CSVs should have the same columns, so rather than
+                # working the types out again, we reuse the first file's, already made smaller
+                # where needed. Only floats and text are reused, as anything else could stop
+                # fitting in a later file (whole numbers in one, fractions in the next), so
+                # integers and columns that were empty in the first file are left to Arrow.
+                if not file_number:
+                    column_types = {
+                        field.name: field.type if arguments.high_precision
+                        else ARROW_LOW_PRECISION.get(field.type, field.type)
+                        for field in schema
+                        if pyarrow.types.is_floating(field.type) or pyarrow.types.is_string(field.type)
+                    }
+                    column_types.update(datetime_types)
+
+                for batch in file_batches:
+                    batches.put((csv_filename, batch))
+
+                    # If the writer has given up, there's no point reading any more
+                    if stop.is_set():
+                        return
+            except pyarrow.ArrowInvalid:
+                # If the file doesn't fit the types we expected, try again reading it whole,
+                # but if we already were, the problem is with the file itself
+                if csv_filename in whole_files:
+                    raise
+                batches.put((csv_filename, ConversionRestart(whole_file=csv_filename)))
+                return
+    except Exception as error:
+        batches.put((csv_filename, error))
+        return
+
+    batches.put((csv_filename, None))
+
+
+def write_experiment(
+        csv_filenames: List[Path], parquet_filename: Path, arguments: Namespace,
+        schema: Optional[pyarrow.Schema], whole_files: Set[Path]
+) -> bool:
+    """
+    Streams each CSV through Arrow's reader straight into the Parquet writer,
+    so we never build a DataFrame. One writer covers all the CSVs in order.
+
+    The schema comes from the first batch, unless we're given one from an earlier
+    attempt. Columns missing from some of the CSVs are left empty there.
+    Returns whether there were any rows to write.
+    """
+    writer: Optional[pyarrow.parquet.ParquetWriter] = None
+    csv_filename: Optional[Path] = None
+
+    # Batches are saved up until there's enough for a full row group
+    buffered: List[pyarrow.Table] = []
+    buffered_rows: int = 0
+
+    # The CSVs are read on another thread, a few batches ahead of the one being written
+    batches: Queue = Queue(maxsize=CSV_READ_AHEAD)
+    stop: Event = Event()
+    Thread(
+        target=read_csv_batches,
+        args=(csv_filenames, arguments, whole_files, batches, stop),
+        daemon=True
+    ).start()
+    try:
+        while True:
+            csv_filename, batch = batches.get()
+            if batch is None:
+                break  # The reader has got through every file
+            elif isinstance(batch, Exception):
+                raise batch
+
+            table: pyarrow.Table = pyarrow.Table.from_batches([batch])
+
+            # The index is just row number so we don't need to duplicate it
+            if arguments.index:
+                table = table.drop_columns([arguments.index])
+
+            # Remove all the ' ' in the column names, and replace them with '_'.
+            # This only changes the schema, so it costs nothing to do for every batch.
+            table = table.rename_columns(
+                [name.translate(COLUMN_NAME_TRANSLATION) for name in table.column_names]
+            )
+
+            # The first batch decides the schema, later ones must fit in it
+            if writer is None:
+                if schema is None:
+                    schema = pyarrow.schema(
+                        [
+                            field.with_type(storage_type(field.type, arguments))
+                            for field in table.schema
+                        ],
+                        metadata=table.schema.metadata
+                    )
+
+                writer = pyarrow.parquet.ParquetWriter(
+                    parquet_filename, schema,
+                    compression=arguments.parquet_compression,
+                    compression_level=arguments.parquet_compression_level,
+                    use_dictionary=True,
+                    data_page_size=PARQUET_DATA_PAGE_SIZE,
+                    write_statistics=True,  # Lets readers skip row groups they don't need
+                    version='2.6'  # Allows nanosecond timestamps
+                )
+
+            # Later CSVs may have their columns in a different order, or not have them all,
+            # so line them up with the file's by name, never by position, and leave any
+            # gaps empty, as pandas.concat would
+            if table.column_names != writer.schema.names:
+                # A column we haven't seen before has to be added to the file, and the
+                # types in a Parquet file can't change part way through, so start again
+                new_fields: List[pyarrow.Field] = [
+                    field.with_type(storage_type(field.type, arguments))
+                    for field in table.schema if field.name not in writer.schema.names
+                ]
+                if new_fields:
+                    raise ConversionRestart(
+                        schema=pyarrow.schema(
+                            list(writer.schema) + new_fields, metadata=writer.schema.metadata
+                        )
+                    )
+
+                table = pyarrow.Table.from_arrays(
+                    [
+                        table.column(field.name) if field.name in table.column_names
+                        else pyarrow.nulls(table.num_rows, field.type)
+                        for field in writer.schema
+                    ],
+                    names=writer.schema.names
+                )
+
+            # A single cast converts every column that needs it at once. If they don't
+            # fit, the types in a Parquet file can't change part way through, so we
+            # start again with types wide enough for both.
+            if not table.schema.equals(writer.schema):
+                try:
+                    table = table.cast(writer.schema)
+                except ARROW_CAST_ERRORS:
+                    promoted: pyarrow.Schema = promote_schema(writer.schema, table, arguments)
+                    if promoted.equals(writer.schema):
+                        raise
+                    raise ConversionRestart(schema=promoted)
+
+            buffered.append(table)
+            buffered_rows += table.num_rows
+            if buffered_rows >= PARQUET_ROW_GROUP_SIZE:
+                # Write as many full row groups as we can, and keep the rest for later
+                table = pyarrow.concat_tables(buffered)
+                full_rows: int = buffered_rows - buffered_rows % PARQUET_ROW_GROUP_SIZE
+                writer.write_table(
+                    table.slice(0, full_rows), row_group_size=PARQUET_ROW_GROUP_SIZE
+                )
+                buffered = [table.slice(full_rows)]
+                buffered_rows -= full_rows
+
+                # Let go of the rows we've written before reading the next block,
+                # so only about a row group's worth of the experiment is in memory
+                del batch, table
+
+        # Whatever is left over makes up the last, smaller, row group
+        if buffered_rows:
+            writer.write_table(pyarrow.concat_tables(buffered))
+    except Exception as error:
+        # Stop the reader, and empty the queue in case it's waiting for space
+        stop.set()
+        while not batches.empty():
+            batches.get_nowait()
+
+        # Don't leave a half-written file behind, or we'd skip it next time
+        if writer is not None:
+            writer.close()
+        parquet_filename.unlink(missing_ok=True)
+
+        if isinstance(error, ConversionRestart):
+            raise
+
+        # If it didn't work, provide a nicer error, only suggesting the column
+        # arguments are wrong if it was one of them that couldn't be found
+        if not isinstance(error, KeyError):
+            raise Exception(f"Failed to convert '{csv_filename}': {error}") from error
+        raise Exception(
+            f"Failed to convert '{csv_filename}': no column {error}." +
+            (f" Is index column '{arguments.index}' correct?" if arguments.index else '') +
+            (f" Is datetime column '{arguments.datetimes}' correct?" if arguments.datetimes else '')
+        ) from error
+
+    # If the CSVs only had headers, there's nothing to save
+    if writer is None:
+        return False
+    writer.close()
+    return True
+
+
+def convert_experiment(
+        experiment_directory: Path, parquet_filename: Path, arguments: Namespace
+) -> Tuple[int, int, Optional[str]]:
+    """
+    Converts all the CSV files in one experiment directory into a single Parquet file.
+
+    Returns the total size of the CSV files, the size of the Parquet file, and
+    a description of why the directory was empty (or None if it wasn't).
+    Each experiment is independent, so this can run on many at once.
+    """
+    # Get a sorted list of all the CSV files within this directory, and count
+    # their original size as we go, from the details the scan already has
+    csv_filenames: List[Path] = []
+    original_size: int = 0
+    with scandir(experiment_directory) as entries:
+        for entry in entries:
+            if fnmatch(entry.name, arguments.csv_pattern) and entry.is_file():
+                csv_filenames.append(Path(entry.path))
+                original_size += entry.stat().st_size
+    csv_filenames.sort()
+
+    # If there *isn't* anything here, then let's move on
+    if not csv_filenames:
+        return 0, 0, f"{experiment_directory}: No files matching '{arguments.csv_pattern}'"
+
+    if arguments.parquet_engine == 'pyarrow':
+        # Each restart either widens the schema or reads another file whole,
+        # so this can only go round a few times before the experiment fits
+        schema: Optional[pyarrow.Schema] = None
+        whole_files: Set[Path] = set()
+        while True:
+            try:
+                written: bool = write_experiment(
+                    csv_filenames, parquet_filename, arguments, schema, whole_files
+                )
+                break
+            except ConversionRestart as restart:
+                if restart.schema is not None:
+                    schema = restart.schema
+                if restart.whole_file is not None:
+                    whole_files.add(restart.whole_file)
+
+        # If the CSVs only had headers, there's nothing to save
+        if not written:
+            return original_size, 0, \
+                f"{experiment_directory}: No rows in files matching '{arguments.csv_pattern}'"
+
+    else:
+        # Pandas can't stream, so rather than concatenating every CSV into one big
+        # dataframe, we append each one to the Parquet file as its own row group
+        written_dtypes: Optional[pandas.Series] = None
+        for file_number, csv_filename in enumerate(csv_filenames):
+            try:
+                dataframe: DataFrame = pandas.read_csv(
+                    csv_filename, 
+                    engine=arguments.csv_engine,
+                    parse_dates=[arguments.datetimes] if arguments.datetimes else False,
+                    date_format=arguments.datetime_format,
+                    cache_dates=True,  # Most rows share their date with their neighbours
+                    index_col=arguments.index if arguments.index else None,
+                    **CSV_ENGINE_OPTIONS[arguments.csv_engine]
+                )
+
+                # The pyarrow engine gives datetimes to the second, which fastparquet
+                # misreads as a finer unit, so we always hand it nanoseconds
+                if arguments.datetimes and arguments.datetimes in dataframe.columns:
+                    dataframe[arguments.datetimes] = dataframe[arguments.datetimes].dt.as_unit('ns')
+            except Exception as error:
+                # Don't leave a half-written file behind, or we'd skip it next time
+                parquet_filename.unlink(missing_ok=True)
+
+                # If it didn't work, provide a nicer error
+                raise Exception(
+                    f"Failed to read '{csv_filename}': {error}." +
+                    (f" Is index column '{arguments.index}' correct?" if arguments.index else '') +
+                    (f" Is datetime column '{arguments.datetimes}' correct?" if arguments.datetimes else '')
+                ) from error
+
+            # Convert all the numeric columns to smaller, unless we know it's a good file
+            if not arguments.high_precision:
+                dataframe = lower_precision(dataframe)
+
+            # Remove all the ' ' in the column names, and replace them with '_'
+            dataframe.rename(
+                columns={
+                    column: column.translate(COLUMN_NAME_TRANSLATION) for column in dataframe.columns
+                },
+                inplace=True  # Edit the current dataframe
+            )
+
+            # Appending keeps the types already in the file, so a CSV whose columns came out
+            # differently (like fractions in a column that was whole numbers) would be silently
+            # cut down to fit. Instead we read back what's there and write it all out again,
+            # in the types pandas.concat would have given it.
+            append: bool = bool(file_number)
+            if append and not dataframe.dtypes.equals(written_dtypes):
+                dataframe = pandas.concat(
+                    [pandas.read_parquet(parquet_filename, engine=arguments.parquet_engine), dataframe],
+                    ignore_index=True
+                )
+                if not arguments.high_precision:
+                    dataframe = lower_precision(dataframe)
+                append = False
+
+            # Save the dataframe out to the Parquet file, after any earlier CSVs
+            dataframe.to_parquet(
+                parquet_filename, 
+                index=False,  # The index is just row number so we don't need to duplicate it
+                engine=arguments.parquet_engine,
+                compression=arguments.parquet_compression,
+                **({'append': True} if append else {})  # Passed on to fastparquet.write
+            )
+            written_dtypes = dataframe.dtypes
+
+            # Let go of this CSV before reading the next, so only one is in memory at once
+            del dataframe
+    return original_size, parquet_filename.stat().st_size, None
 
 
 parser: ArgumentParser = ArgumentParser(
@@ -50,6 +560,11 @@ parser.add_argument(
     '-dt', '--datetimes',
     type=str, help="Column in the CSVs to parse as datetimes."
 )
+parser.add_argument(
+    '-df', '--datetime-format',
+    type=str, help="Format of the datetimes in the CSVs, e.g. '%%d/%%m/%%Y %%H:%%M:%%S'.\n"
+                   "By default, expects ISO 8601 datetimes (other engines guess the format)."
+)
 parser.add_argument(
     '-i', '--index',
     type=str, help="Column in the CSVs to use as an index."
@@ -69,13 +584,20 @@ parser.add_argument(
 parser.add_argument(
     '-hp', '--high-precision', action='store_true', default=False,
     help="Whether to store numeric data in the file as 64-bit floats and ints.\n"
-         "By default, assumes that the CSVs are only accurate to 32 bit (~7dp).\n"
+         "By default, assumes that the CSVs are only accurate to 32 bit (~7dp),\n"
+         "except for integers too big for 32 bits, which are always kept as 64.\n"
          "If set, the Parquet files will be about twice as large."
 )
 parser.add_argument(
     '-v', '--verbose', action='store_true', default=False,
     help="Whether to print out all the skipped directories."
 )
+parser.add_argument(
+    '-j', '--jobs',
+    type=int, default=cpu_count(),
+    help="Number of experiments to convert at the same time.\n"
+         "By default, one per CPU."
+)
 
 parser_pattern = parser.add_argument_group('file pattern arguments')
 parser_pattern.add_argument(
@@ -100,18 +622,37 @@ parser_pattern.add_argument(
 parser_parquet = parser.add_argument_group('parquet arguments')
 parser_parquet.add_argument(
     '-pe', '--parquet-engine',
-    default=PARQUET_ENGINE, type=str,
+    default=PARQUET_ENGINE, type=str, choices=('pyarrow', 'fastparquet'),
     help="Engine to use for Parquet file write.\n"
-         f"By default '{PARQUET_ENGINE}'; takes all options from Pandas to_parquet."
+         f"By default '{PARQUET_ENGINE}', which streams the CSVs without using Pandas;\n"
+         "'fastparquet' goes through Pandas to_parquet, and needs installing separately."
+)
+parser_parquet.add_argument(
+    '-ce', '--csv-engine',
+    default=CSV_ENGINE, type=str, choices=('pyarrow', 'c', 'python'),
+    help="Engine Pandas uses to read the CSVs, for Parquet engines other than 'pyarrow'.\n"
+         f"By default '{CSV_ENGINE}', which is multi-threaded; 'c' copes with more unusual CSVs."
 )
 parser_parquet.add_argument(
     '-pc', '--parquet-compression', 
     default=PARQUET_COMPRESSION, type=str,
     help="Type of compression to use for Parquet files.\n"
-         f"By default '{PARQUET_COMPRESSION}'; takes all options from Pandas to_parquet."
+         f"By default '{PARQUET_COMPRESSION}'; takes all options from Pandas to_parquet.\n"
+         "Use 'snappy' if writing speed matters more than size, or 'gzip' for older readers."
+)
+parser_parquet.add_argument(
+    '-pcl', '--parquet-compression-level',
+    default=None, type=int,
+    help="Level of compression to use for Parquet files, if the compression type has levels.\n"
+         f"By default {PARQUET_COMPRESSION_LEVEL} for '{PARQUET_COMPRESSION}', or the usual level for other types.\n"
+         "Only used by the 'pyarrow' engine."
 )
 arguments = parser.parse_args()
 
+# Not every compression type has levels, so we only pick one for our default type
+if arguments.parquet_compression_level is None and arguments.parquet_compression == PARQUET_COMPRESSION:
+    arguments.parquet_compression_level = PARQUET_COMPRESSION_LEVEL
+
 print(
     f"Converting campaigns in '{arguments.start_directory}' "
     f"matching '{arguments.directory_pattern}' to Parquet"
@@ -129,114 +670,75 @@ empty_directories: List[str] = []
 # TQDM doesn't like printing errors within loops so we do this
 
 
-# We use glob to get everything in the current directory matching our pattern
+# We scan for everything in the current directory matching our pattern
 # then ignore everything that isn't a directory itself (or hidden!)
-campaign_directories: List[Path] = [
-    item for item in arguments.start_directory.glob(
-        arguments.directory_pattern
-    ) if item.is_dir() and not item.name.startswith('.')
-]
+campaign_directories, _ = scan_directory(
+    arguments.start_directory, arguments.directory_pattern
+)
 campaign_directories_progress: tqdm = tqdm(
     campaign_directories, desc="Scanning", unit=" directory"
 )
 
+# Experiments are converted in parallel. Threads are enough, as PyArrow
+# does its parsing and writing without holding on to the GIL.
+executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=arguments.jobs)
+
 for campaign_directory in campaign_directories_progress:
-    # We use glob again to find everything matching our pattern
-    # and ignore anything that isn't a directory (e.g. the Parquet files!)
-    experiment_directories: List[Path] = [
-        item for item in campaign_directory.glob(
-            arguments.subdirectory_pattern
-            ) if item.is_dir() and not item.name.startswith('.')
-    ]
-    experiment_directories_progress: tqdm = tqdm(
-        experiment_directories, desc=str(campaign_directory), leave=False, unit=" experiment"
+    # We scan again to find everything matching our pattern and ignore anything
+    # that isn't a directory, but keep a note of the Parquet files already there
+    experiment_directories, campaign_filenames = scan_directory(
+        campaign_directory, arguments.subdirectory_pattern
     )
 
-    for experiment_directory in experiment_directories_progress:
-        experiment_directories_progress.set_postfix(
-            {'current': experiment_directory.name}
-        )
-        
+    futures: Dict[Future, Path] = {}
+    for experiment_directory in experiment_directories:
         # Don't overwrite unless we're ordered to!
         parquet_filename: Path = experiment_directory.with_suffix(
             experiment_directory.suffix + '.parquet'
             )
-        if parquet_filename.exists() and not arguments.overwrite:
+        if parquet_filename.name in campaign_filenames and not arguments.overwrite:
             num_files_skipped += 1
             continue
 
-        # Get a sorted list of all the CSV files within this directory 
-        csv_filenames: List[Path] = list(
-            experiment_directory.glob(
-                arguments.csv_pattern
-            )
-        )
-        csv_filenames.sort()
-
-        # If there *isn't* anything here, then let's move on
-        if not csv_filenames:
-            empty_directories.append(
-                f"{experiment_directory}: No files matching '{arguments.csv_pattern}'"
+        futures[
+            executor.submit(
+                convert_experiment, experiment_directory, parquet_filename, arguments
             )
-            continue  # We skip this directory and go to the next one
+        ] = experiment_directory
 
-        # Count the original size of these files
-        for csv_filename in csv_filenames:
-            original_sizes += csv_filename.stat().st_size
+    experiment_directories_progress: tqdm = tqdm(
+        as_completed(futures), total=len(futures),
+        desc=str(campaign_directory), leave=False, unit=" experiment"
+    )
 
-        # Load all the dataframes we found
-        try:
-            dataframes: List[DataFrame] = [
-                pandas.read_csv(
-                    csv_filename, 
-                    parse_dates=[arguments.datetimes] if arguments.datetimes else False,
-                    infer_datetime_format=True,
-                    index_col=arguments.index if arguments.index else None
-                ) for csv_filename in csv_filenames
-            ]
-        except Exception as error:
-            # If it didn't work, provide a nicer error
-            raise Exception(
-                f"Failed to read '{csv_filename}'." +
-                (f" Is index column '{arguments.index}' correct?" if arguments.index else '') +
-                (f" Is datetime column '{arguments.datetimes}' correct?" if arguments.datetimes else '')
+    try:
+        for future in experiment_directories_progress:
+            experiment_directories_progress.set_postfix(
+                {'finished': futures[future].name}
             )
 
-        # Concatenate all the dataframes we found into one
-        dataframe: DataFrame = pandas.concat(dataframes)
+            original_size, parquet_size, empty_directory = future.result()
+            if empty_directory:
+                empty_directories.append(empty_directory)
+            else:
+                original_sizes += original_size
+                parquet_sizes += parquet_size
+                num_files_converted += 1
+    except:
+        # If one experiment failed, report it straight away rather than waiting for all
+        # the others first. Queued experiments are cancelled, but the ones already
+        # running can't be interrupted, so Python finishes them before it exits.
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
 
-        # Convert all the numeric columns to smaller, unless we know it's a good file
-        if not arguments.high_precision:
-            for column in dataframe.select_dtypes('float64'):
-                dataframe[column] = dataframe[column].astype('float32')
-
-            for column in dataframe.select_dtypes('int64'):
-                dataframe[column] = dataframe[column].astype('int32')
-
-        # Remove all the ' ' in the column names, and replace them with '_'
-        dataframe.rename(
-            columns={
-                column: column.replace(' ', '_') for column in dataframe.columns
-            },
-            inplace=True  # Edit the current dataframe
-        )
-
-        # Save the dataframe back out to a Parquet file
-        dataframe.to_parquet(
-            parquet_filename, 
-            index=False,  # The index is just row number so we don't need to duplicate it
-            engine=arguments.parquet_engine,
-            compression=arguments.parquet_compression
-        )
-        parquet_sizes += parquet_filename.stat().st_size 
-        num_files_converted += 1
-    
     if not experiment_directories:
         empty_directories.append(
             f"{campaign_directory}: No subdirectories matching "
             f"'{arguments.subdirectory_pattern}'"
         )
 
+executor.shutdown()
+
 if not campaign_directories:    
     empty_directories.append(
         f"{arguments.directory}: No directories matching "
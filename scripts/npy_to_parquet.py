@@ -10,20 +10,21 @@ The default format is: Time (unix seconds), Current, Voltage, Temperature
 If this doesn't work, the user will be prompted to create a new format file.
 """
 import numpy  # Everyone uses Numpy as a full import so I will for consistency
-import pandas  # Everyone uses Pandas as a full import so I will for consistency
+import pyarrow  # And the same goes for PyArrow, and the submodules we need
+import pyarrow.parquet
 
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
 from pathlib import Path
 from platform import system
-from typing import List
+from typing import Dict, List, Optional
 from yaml import safe_load
 from numpy.typing import NDArray
-from pandas import DataFrame  # Except for this, to make the type hinting prettier
 from tqdm import tqdm
 
 GLOB_NPY_PATTERN: str = "*.[Nn][Pp][Yy]"  # Case-insensitive for the suffix.
-PARQUET_COMPRESSION: str = "gzip"  # gzip is ~20% slower than the default 'snappy', but ~2x smaller
-PARQUET_ENGINE: str = "fastparquet"  # For more options for this and compression, see pandas dataframe.to_parquet 
+PARQUET_COMPRESSION: str = "zstd"  # zstd is about as small as gzip, but several times faster to write and read
+PARQUET_COMPRESSION_LEVEL: int = 3  # zstd goes from 1 to 22; higher levels are smaller but slower to write
+PARQUET_ENGINE: str = "pyarrow"  # Writes directly; other engines go through pandas dataframe.to_parquet
 NPY_FORMAT_DEFAULT: str = \
 """columns: 
   - Time
@@ -67,15 +68,24 @@ parser.add_argument(
 parser_parquet = parser.add_argument_group('parquet arguments')
 parser_parquet.add_argument(
     '-pe', '--parquet-engine',
-    default=PARQUET_ENGINE, type=str,
+    default=PARQUET_ENGINE, type=str, choices=('pyarrow', 'fastparquet'),
     help="Engine to use for Parquet file write.\n"
-         f"By default '{PARQUET_ENGINE}'; takes all options from Pandas to_parquet."
+         f"By default '{PARQUET_ENGINE}'; 'fastparquet' goes through Pandas to_parquet,\n"
+         "and needs installing separately."
 )
 parser_parquet.add_argument(
     '-pc', '--parquet-compression', 
     default=PARQUET_COMPRESSION, type=str,
     help="Type of compression to use for Parquet files.\n"
-         f"By default '{PARQUET_COMPRESSION}'; takes all options from Pandas to_parquet."
+         f"By default '{PARQUET_COMPRESSION}'; takes all options from Pandas to_parquet.\n"
+         "Use 'snappy' if writing speed matters more than size, or 'gzip' for older readers."
+)
+parser_parquet.add_argument(
+    '-pcl', '--parquet-compression-level',
+    default=None, type=int,
+    help="Level of compression to use for Parquet files, if the compression type has levels.\n"
+         f"By default {PARQUET_COMPRESSION_LEVEL} for '{PARQUET_COMPRESSION}', or the usual level for other types.\n"
+         "Only used by the 'pyarrow' engine."
 )
 arguments = parser.parse_args()
 
@@ -85,6 +95,25 @@ if arguments.format:
 else:
     npy_format: dict = safe_load(NPY_FORMAT_DEFAULT)
 
+# Work out what each column is once, rather than for every file: its name,
+# and for dates, how many nanoseconds there are in each of its units.
+# If the format doesn't make sense, we hold on to the error until we're
+# converting a file, so it's handled the same as a file that doesn't fit.
+format_error: Optional[Exception] = None
+try:
+    column_names: List[str] = npy_format['columns']
+    date_scales: Dict[int, float] = {
+        column_names.index(date_name): numpy.timedelta64(1, date_units) / numpy.timedelta64(1, 'ns')
+        for date_name, date_units in npy_format['date_column'].items()
+    }
+except Exception as error:
+    format_error = error
+use_float32: bool = bool(npy_format.get('float32'))
+
+# Not every compression type has levels, so we only pick one for our default type
+if arguments.parquet_compression_level is None and arguments.parquet_compression == PARQUET_COMPRESSION:
+    arguments.parquet_compression_level = PARQUET_COMPRESSION_LEVEL
+
 print(
     f"Converting files in '{arguments.start_directory}' "
     f"matching '{arguments.npy_pattern}' to Parquet. "
@@ -119,22 +148,42 @@ for npy_filename in npy_filenames_progress:
     # Count the original size of the file
     original_sizes += npy_filename.stat().st_size
 
-    # We load the file, but it's *just* raw numbers
-    array: NDArray = numpy.load(npy_filename)
+    # We map the file rather than loading it, as it's *just* raw numbers,
+    # so the OS can read it straight into the copy we make below
+    mapped: NDArray = numpy.load(npy_filename, mmap_mode='r')
+
+    # The rows are stored one after another, so every column is spread out across
+    # the file. Transposing once into a new array puts each column in one block,
+    # and if we want 32-bit numbers it converts them in the same pass over the file.
+    array: NDArray = mapped
+    if mapped.ndim == 2:
+        array = mapped.T.astype(
+            numpy.float32 if use_float32 else mapped.dtype, order='C'
+        )
     
-    # So we store the columns in a dataframe, with the correct names
+    # So we store the columns in an Arrow table, with the correct names
     # and correct the time column to a datetime
     try:
-        dataframe: DataFrame = DataFrame(
-            {
-                name: array[:, idx] for idx, name in enumerate(npy_format['columns'])
-            }
-        )
+        if format_error:
+            raise format_error
 
-        for date_name, date_units in npy_format['date_column'].items():
-            dataframe[date_name] = pandas.to_datetime(
-                dataframe[date_name], unit=date_units
-            )
+        columns: List[pyarrow.Array] = []
+        for idx in range(len(column_names)):
+            column: NDArray = array[idx]
+
+            if idx in date_scales:
+                # Dates need the full precision, so we take them from the file itself,
+                # then scale to nanoseconds since the epoch, whatever the units
+                column = (mapped[:, idx] * date_scales[idx]).astype('datetime64[ns]')
+
+            # Missing values are stored as NaN, which Parquet readers expect as nulls,
+            # as they were when the table went through pandas
+            columns.append(pyarrow.array(column, from_pandas=True))
+
+        # The batch wraps each column's buffer as it is, rather than copying it again
+        table: pyarrow.Table = pyarrow.Table.from_batches(
+            [pyarrow.record_batch(columns, names=column_names)]
+        )
     except:
         format_file: Path = Path(
             npy_filename.with_name(
@@ -148,14 +197,25 @@ for npy_filename in npy_filenames_progress:
             f"then re-run using '-f FORMAT_FILE_NAME'."
         )
 
-    # Save the dataframe back out to a Parquet file
+    # Save the table back out to a Parquet file
     parquet_filename = npy_filename.with_suffix('.parquet')
-    dataframe.to_parquet(
-        parquet_filename, 
-        index=False,  # The index is just row number so we don't need to duplicate it
-        engine=arguments.parquet_engine,
-        compression=arguments.parquet_compression
-    )
+    if arguments.parquet_engine == 'pyarrow':
+        pyarrow.parquet.write_table(
+            table, parquet_filename,
+            compression=arguments.parquet_compression,
+            compression_level=arguments.parquet_compression_level,
+            use_dictionary=True,
+            write_statistics=True,  # Lets readers skip parts of the file they don't need
+            version='2.6'  # Allows nanosecond timestamps
+        )
+    else:
+        # Other engines only take dataframes
+        table.to_pandas().to_parquet(
+            parquet_filename, 
+            index=False,  # The index is just row number so we don't need to duplicate it
+            engine=arguments.parquet_engine,
+            compression=arguments.parquet_compression
+        )
     parquet_sizes += parquet_filename.stat().st_size 
     num_files_converted += 1
 
@@ -12,9 +12,12 @@ setup(
     install_requires=[
         'pyyaml',
         "numpy",
-        "pandas",
-        "fastparquet",
+        "pandas>=2.0",
+        "pyarrow>=14",
         "tqdm"
     ],
+    extras_require={
+        "fastparquet": ["fastparquet"]
+    },
     long_description=open('README.md').read(),
 )
\ No newline at end of file